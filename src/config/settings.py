@@ -11,6 +11,20 @@ class Settings(BaseSettings):
     COUNTRY_CODE: str = "CO"
     MAX_HOURS_PER_DAY: float = 8.0
     MAX_TASKS_PER_DAY: int = 4
+    MIN_TASK_HOURS: float = 0.5
+    MAX_TASK_HOURS: float = 3.0
+    
+    # LLM output recovery
+    LLM_CONTINUATION_ATTEMPTS: int = 1 # Follow-up requests for missing hours after truncated output
+    
+    # LLM latency control
+    LLM_LATENCY_BUDGET: float = 300.0 # Seconds per run before degrading to the commit-based fallback
+    LLM_HEDGING: bool = True # Fire a request to the other backend when the primary is slow
+    LLM_HEDGE_WITH_OLLAMA: bool = False # With USE_OLLAMA=False, hedge slow DeepSeek calls with a local Ollama
+    LLM_HEDGE_DELAY: float = 30.0 # Hedge threshold (seconds) until enough latency samples exist
+    LLM_HEDGE_PERCENTILE: float = 90.0 # Primary time-to-first-output percentile used as hedge threshold
+    LLM_HEDGE_MIN_SAMPLES: int = 5
+    LLM_LATENCY_STATS_FILE: str = "latency_stats.json" # Per-backend latency histograms (inside LOGS_DIR)
     
     # Output Settings
     LANGUAGE: str = "es" # 'es' | 'en'
@@ -25,6 +39,13 @@ class Settings(BaseSettings):
         r"C:\Users\esteb\Desktop\REPOS-SYNAPTICA\proyecto-fac-cpa"
     ]
 
+    # Repository auto-discovery (--discover or WORKSPACE_ROOTS)
+    WORKSPACE_ROOTS: List[str] = []
+    REPO_DISCOVERY_EXCLUDE_DIRS: List[str] = ["node_modules", ".venv", "venv", "__pycache__", ".tox", ".mypy_cache"]
+    REPO_DISCOVERY_WORKERS: int = 16
+    REPO_DISCOVERY_STOP_AT_REPO: bool = False # Don't walk inside a repository's working tree (faster, misses nested repos)
+    REPO_DISCOVERY_CACHE_FILE: str = "repo_cache.json" # Directory listings + mtimes (inside LOGS_DIR)
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 settings = Settings()
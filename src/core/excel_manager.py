@@ -1,10 +1,26 @@
 import openpyxl
 from openpyxl.styles import PatternFill, Alignment, Font
+from openpyxl.utils import get_column_letter, quote_sheetname, range_boundaries
+from openpyxl.workbook.defined_name import DefinedName
+from src.utils.excel_utils import RowShift, shift_formula, shift_row_span
 from datetime import date
-from typing import Dict, List, Any
+from difflib import SequenceMatcher
+from typing import Dict, List, Any, Optional, Tuple
 import os
 import shutil
 
+# Layout of the month sheets
+START_ROW = 4 # Row 1 headers, Row 2 consultant info, Row 3 empty
+DAY_COL_OFFSET = 3 # '1' is in Col D (4th col). So Day X is at Col index 3 + X.
+LAST_DAY_COL = DAY_COL_OFFSET + 31
+# Sheet-scoped defined name holding the task rows written by the tool. Excel adjusts it when
+# rows are inserted by hand; patch_report rewrites it after its own inserts/deletes.
+MANAGED_RANGE_NAME = "AutoReportTasks"
+
+# Yellow Fill style
+YELLOW_FILL = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+NO_FILL = PatternFill(fill_type=None)
+
 class ExcelManager:
     def __init__(self, template_path: str):
         self.template_path = template_path
@@ -14,9 +30,10 @@ class ExcelManager:
             9: "SEPTIEMBRE", 10: "OCTUBRE", 11: "NOVIEMBRE", 12: "DICIEMBRE"
         }
     
-    def create_report(self, schedule: Dict[date, List[Dict]], year: int, month: int, consultant_name: str = "Esteban Marulanda"):
+    def create_report(self, schedule: Dict[date, List[Dict]], year: int, month: int, consultant_name: str = "Esteban Marulanda", patch: bool = False):
         """
         Creates a new report file filled with the schedule.
+        With patch=True an existing report is updated in place instead (see patch_report).
         """
         month_name = self.months_map.get(month, "").upper()
         if not month_name:
@@ -26,16 +43,14 @@ class ExcelManager:
         output_filename = f"Reporte_{year}_{month_name}.xlsx"
         output_path = os.path.join(os.path.dirname(self.template_path), output_filename)
         
+        if patch and os.path.exists(output_path):
+            return self.patch_report(schedule, output_path, month_name)
+
         # Copy template
         shutil.copyfile(self.template_path, output_path)
         
         workbook = openpyxl.load_workbook(output_path)
-        
-        if month_name not in workbook.sheetnames:
-            print(f"Sheet {month_name} not found in template. Using active sheet.")
-            sheet = workbook.active
-        else:
-            sheet = workbook[month_name]
+        sheet = self._get_sheet(workbook, month_name)
             
         # Write Header Info if needed (Consultant Name)
         # Assuming row 2 is "Nombre del Consultor" based on image, maybe cell B2 or merged A2?
@@ -43,12 +58,7 @@ class ExcelManager:
         # The user said "llenar por fila una tarea".
         # Let's assume start row index = 4 (leaving header space).
         
-        start_row = 4 # Guessing based on image (Row 1 headers, Row 2 Info, Row 3 headers maybe empty?)
-        
-        # Yellow Fill style
-        yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        
-        current_row = start_row
+        current_row = START_ROW
         
         # Sort days to write in order
         sorted_days = sorted(schedule.keys())
@@ -70,13 +80,206 @@ class ExcelManager:
                 sheet.cell(row=current_row, column=3, value=task.get('hours', 0))
                 
                 # Mark the day column
-                day_col_idx = 3 + day_num
+                day_col_idx = DAY_COL_OFFSET + day_num
                 cell = sheet.cell(row=current_row, column=day_col_idx)
                 cell.value = "X" # Or input hours? "Then paint yellow the day". Usually just X or hours.
                 # User said: "Luego pintar en amarillo el dia que se hizo"
-                cell.fill = yellow_fill
+                cell.fill = YELLOW_FILL
                 
                 current_row += 1
                 
+        self._set_managed_range(sheet, START_ROW, current_row - 1)
         workbook.save(output_path)
         return output_path
+
+    def patch_report(self, schedule: Dict[date, List[Dict]], output_path: str, month_name: str):
+        """
+        Updates an existing report in place.
+        The rows already written (keyed by day and task name) are diffed against the new schedule,
+        and only changed rows are updated, inserted or deleted. Only rows inside the managed range
+        are ever deleted; manual edits outside it are kept. When rows shift, formulas, defined names
+        and merged cells are adjusted like Excel would. Raises ValueError if rows must shift under
+        conditional formatting or data validation, which openpyxl can't move safely.
+        """
+        workbook = openpyxl.load_workbook(output_path)
+        sheet = self._get_sheet(workbook, month_name)
+
+        first_row, last_row = self._get_managed_range(sheet)
+        old_rows = self._read_managed_rows(sheet, first_row, last_row)
+        new_rows = [(day.day, task) for day in sorted(schedule.keys()) for task in schedule[day]]
+
+        old_keys = [(day_num, values[0]) for day_num, values in old_rows]
+        new_keys = [(day_num, task.get('task_name', '')) for day_num, task in new_rows]
+
+        updated = inserted = deleted = 0
+        offset = 0 # Rows inserted minus rows deleted so far
+        shifts = []
+        opcodes = SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+        if any(i2 - i1 != j2 - j1 for _, i1, i2, j1, j2 in opcodes):
+            self._check_rows_can_shift(sheet, first_row)
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            row = first_row + i1 + offset
+            # Rows present on both sides are updated in place (only differing cells)
+            common = min(i2 - i1, j2 - j1)
+            for k in range(common):
+                updated += self._write_row(sheet, row + k, new_rows[j1 + k], old_rows[i1 + k])
+
+            if j2 - j1 > common:
+                count = j2 - j1 - common
+                # Appending right below the block: ranges ending on its last row grow with it
+                block_last = last_row + offset
+                extend_row = block_last if row + common == block_last + 1 else None
+                shifts.append(self._shift_rows(sheet, RowShift(row + common, count, extend_row)))
+                for k in range(count):
+                    self._write_row(sheet, row + common + k, new_rows[j1 + common + k])
+                inserted += count
+                offset += count
+            elif i2 - i1 > common:
+                count = i2 - i1 - common
+                shifts.append(self._shift_rows(sheet, RowShift(row + common, -count)))
+                deleted += count
+                offset -= count
+
+        if shifts:
+            self._shift_references(workbook, sheet, shifts)
+
+        print(f"Patched report: {updated} rows updated, {inserted} inserted, {deleted} removed.")
+        if updated or inserted or deleted or sheet.defined_names.get(MANAGED_RANGE_NAME) is None:
+            self._set_managed_range(sheet, first_row, first_row + len(new_rows) - 1)
+            workbook.save(output_path)
+        return output_path
+
+    def _check_rows_can_shift(self, sheet, first_row: int):
+        """Refuses to insert/delete rows under conditional formatting or data validation."""
+        ranges = [cf.sqref for cf in sheet.conditional_formatting]
+        ranges += [dv.sqref for dv in sheet.data_validations.dataValidation]
+        for multi_range in ranges:
+            for cell_range in multi_range.ranges:
+                if cell_range.max_row >= first_row:
+                    raise ValueError(
+                        f"Cannot patch sheet {sheet.title}: conditional formatting or data validation "
+                        f"at {cell_range.coord} would not move with the task rows. "
+                        f"Regenerate the report without --patch."
+                    )
+
+    def _shift_rows(self, sheet, shift: RowShift) -> RowShift:
+        """Inserts or deletes rows, keeping merged cells aligned with the rows that move."""
+        # Unmerge before moving (the top-left value moves with its row), merge again after
+        merged = []
+        for merged_range in list(sheet.merged_cells.ranges):
+            if merged_range.max_row < shift.row:
+                continue
+            span = shift_row_span(merged_range.min_row, merged_range.max_row, shift)
+            sheet.unmerge_cells(merged_range.coord)
+            if span:
+                merged.append((merged_range.min_col, merged_range.max_col, span))
+
+        if shift.amount > 0:
+            sheet.insert_rows(shift.row, shift.amount)
+        else:
+            sheet.delete_rows(shift.row, -shift.amount)
+
+        for min_col, max_col, (min_row, max_row) in merged:
+            sheet.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+        return shift
+
+    def _shift_references(self, workbook, sheet, shifts: List[RowShift]):
+        """
+        Rewrites formulas (in every sheet) and defined names that point at the shifted sheet.
+        openpyxl moves cells on insert/delete but leaves their references untouched.
+        """
+        def shift_all(formula: str, formula_sheet_title: Optional[str]) -> str:
+            for shift in shifts:
+                formula = shift_formula(formula, shift, sheet.title, formula_sheet_title)
+            return formula
+
+        for worksheet in workbook.worksheets:
+            for row in worksheet.iter_rows():
+                for cell in row:
+                    if cell.data_type == 'f' and isinstance(cell.value, str):
+                        cell.value = shift_all(cell.value, worksheet.title)
+
+        scoped_names = [(worksheet.title, worksheet.defined_names) for worksheet in workbook.worksheets]
+        for scope, names in [(None, workbook.defined_names)] + scoped_names:
+            for name, defined_name in names.items():
+                if name == MANAGED_RANGE_NAME or not defined_name.attr_text:
+                    continue
+                defined_name.attr_text = shift_all("=" + defined_name.attr_text, scope)[1:]
+
+    def _get_sheet(self, workbook, month_name: str):
+        if month_name not in workbook.sheetnames:
+            print(f"Sheet {month_name} not found in template. Using active sheet.")
+            return workbook.active
+        return workbook[month_name]
+
+    def _get_managed_range(self, sheet) -> Tuple[int, int]:
+        """
+        Returns (first_row, last_row) of the task rows written by this tool.
+        last_row < first_row means the range is empty.
+        """
+        defined_name = sheet.defined_names.get(MANAGED_RANGE_NAME)
+        if defined_name is not None:
+            for _, ref in defined_name.destinations:
+                _, first_row, _, last_row = range_boundaries(ref)
+                return first_row, last_row
+
+        # Reports written before the range was recorded: contiguous rows with an "X" day mark
+        last_row = START_ROW - 1
+        for cells in sheet.iter_rows(min_row=START_ROW, min_col=DAY_COL_OFFSET + 1, max_col=LAST_DAY_COL):
+            if not any(c.value == "X" for c in cells):
+                break
+            last_row += 1
+        return START_ROW, last_row
+
+    def _set_managed_range(self, sheet, first_row: int, last_row: int):
+        if last_row < first_row:
+            if MANAGED_RANGE_NAME in sheet.defined_names:
+                del sheet.defined_names[MANAGED_RANGE_NAME]
+            return
+
+        ref = f"{quote_sheetname(sheet.title)}!$A${first_row}:${get_column_letter(LAST_DAY_COL)}${last_row}"
+        sheet.defined_names[MANAGED_RANGE_NAME] = DefinedName(MANAGED_RANGE_NAME, attr_text=ref)
+
+    def _read_managed_rows(self, sheet, first_row: int, last_row: int) -> List[Tuple[Optional[int], Tuple]]:
+        """
+        Reads the task rows in the managed range.
+        Returns a list of (day_num, (task_name, client_project, hours)); day_num is the first
+        marked day column, or None if the row has no mark.
+        """
+        rows = []
+        if last_row < first_row:
+            return rows
+
+        for cells in sheet.iter_rows(min_row=first_row, max_row=last_row, max_col=LAST_DAY_COL):
+            values = tuple(c.value for c in cells[:DAY_COL_OFFSET])
+            day_num = next((idx + 1 for idx, c in enumerate(cells[DAY_COL_OFFSET:]) if c.value == "X"), None)
+            rows.append((day_num, values))
+        return rows
+
+    def _write_row(self, sheet, row: int, new: Tuple[int, Dict], old: Optional[Tuple[Optional[int], Tuple]] = None) -> int:
+        """
+        Writes a task row, touching only the cells that differ from the old row.
+        Returns 1 if anything changed, 0 otherwise.
+        """
+        day_num, task = new
+        values = (task.get('task_name', ''), task.get('client_project', ''), task.get('hours', 0))
+        old_day, old_values = old if old else (None, (None, None, None))
+
+        changed = 0
+        for col, (value, old_value) in enumerate(zip(values, old_values), start=1):
+            if value != old_value:
+                sheet.cell(row=row, column=col, value=value)
+                changed = 1
+
+        if day_num != old_day:
+            if old_day is not None:
+                cell = sheet.cell(row=row, column=DAY_COL_OFFSET + old_day)
+                cell.value = None
+                cell.fill = NO_FILL
+            cell = sheet.cell(row=row, column=DAY_COL_OFFSET + day_num)
+            cell.value = "X"
+            cell.fill = YELLOW_FILL
+            changed = 1
+
+        return changed
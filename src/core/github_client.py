@@ -1,7 +1,7 @@
 import subprocess
 import os
 from datetime import datetime, date
-from typing import List, Dict, Optional
+from typing import List, Dict
 
 class LocalGitClient:
     def __init__(self):
@@ -31,6 +31,12 @@ class LocalGitClient:
         
         since_str = start_date.strftime("%Y-%m-%d 00:00:00")
         until_str = end_date.strftime("%Y-%m-%d 23:59:59")
+
+        # Cheap check before the full log: skip repos idle since before the range.
+        # Uses git's own --since so the cutoff is in local time, like the full log below.
+        if not self.has_commits_since(repo_path, since_str):
+            print(f"Skipping {repo_path}: no commits since {start_date}.")
+            return []
         
         # Git command to get log with custom format
         # %H: commit hash
@@ -90,6 +96,19 @@ class LocalGitClient:
                 
         return commits
 
+    def has_commits_since(self, repo_path: str, since_str: str) -> bool:
+        """
+        Returns True if HEAD has at least one commit since since_str (git --since syntax).
+        Only the newest matching commit is read, so this is much cheaper than a full log.
+        """
+        cmd = ['git', '-C', repo_path, 'log', '-1', f'--since={since_str}', '--format=%H']
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8')
+        except subprocess.CalledProcessError:
+            # No commits yet or not a repo: nothing to report
+            return False
+        return bool(result.stdout.strip())
+
     def get_all_commits(self, repo_paths: List[str], start_date: date, end_date: date, author: str = None) -> List[Dict]:
         all_commits = []
         for path in repo_paths:
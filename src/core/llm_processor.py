@@ -1,9 +1,14 @@
 import requests
 import json
+import math
 import os
+import re
+import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.config.settings import settings
+from src.core.llm_router import BackendRouter, BackendCancelled
+from src.utils.json_utils import recover_json
 
 class DeepSeekProcessor:
     def __init__(self):
@@ -22,6 +27,16 @@ class DeepSeekProcessor:
         # Ensure logs dir exists
         os.makedirs(settings.LOGS_DIR, exist_ok=True)
 
+        # Primary backend first; the other one is only used as a hedge
+        ollama = ("Ollama", self._request_ollama)
+        deepseek = ("DeepSeek", self._request_deepseek)
+        backends = [ollama, deepseek] if self.use_ollama else [deepseek, ollama]
+        # Only hedge with a backend that is configured: DeepSeek needs a key, Ollama must be opted in
+        secondary_ready = bool(self.api_key) if self.use_ollama else settings.LLM_HEDGE_WITH_OLLAMA
+        if not settings.LLM_HEDGING or not secondary_ready:
+            backends = backends[:1]
+        self.router = BackendRouter(backends)
+
     def process_commits(self, commits: List[Dict], target_days: int) -> List[Dict]:
         """
         Takes a list of commits and returns a list of refined task entries.
@@ -52,7 +67,7 @@ class DeepSeekProcessor:
         1. **Segment & Expand**: Break down commits to cover {total_hours_needed} hours. A single commit MUST be split into multiple small subtasks (e.g. Planning, Implementation, Testing, Documentation).
         2. **Tone**: Professional corporate in {lang_instruction}.
         3. **Estimate**: Hours per task. 
-        4. **Granularity Constraint**: **NO task can be longer than 3 hours**. Each task must be between 0.5 and 3 hours. You must generate many tasks to fill the quota.
+        4. **Granularity Constraint**: **NO task can be longer than {settings.MAX_TASK_HOURS:g} hours**. Each task must be between {settings.MIN_TASK_HOURS:g} and {settings.MAX_TASK_HOURS:g} hours. You must generate many tasks to fill the quota.
         5. **Output JSON**: List of objects with keys: "task_name", "hours". Return ONLY valid JSON.
         6. **LANGUAGE**: All "task_name" values MUST be in {lang_instruction}. Do NOT use English unless the technical term requires it.
         
@@ -69,19 +84,66 @@ class DeepSeekProcessor:
         # Log input
         self._log_to_file("INPUT", prompt)
         
+        # Latency budget covers the main request and any continuation
+        self.router.start_run()
         try:
-            if self.use_ollama:
-                response = self._call_ollama(prompt)
-            else:
-                response = self._call_deepseek(prompt)
-            
-            return response
-                
+            tasks = self._recover_tasks(self._send_prompt(prompt))
         except Exception as e:
             print(f"Error calling LLM: {e}")
             self._log_to_file("ERROR", str(e))
             return self._fallback(commits)
 
+        # Truncated output or tasks dropped/clamped by validation: only ask for the rest
+        tasks = self._complete_quota(tasks, total_hours_needed, commit_text, lang_instruction)
+
+        return tasks
+
+    def _complete_quota(self, tasks: List[Dict], total_hours_needed: float, commit_text: str, lang_instruction: str) -> List[Dict]:
+        """
+        Sends targeted continuation requests for the hours still missing after recovery and
+        validation, instead of regenerating the whole task list.
+        """
+        for _ in range(settings.LLM_CONTINUATION_ATTEMPTS):
+            missing_hours = total_hours_needed - sum(t['hours'] for t in tasks)
+            if missing_hours < settings.MIN_TASK_HOURS:
+                break
+
+            print(f"LLM tasks cover {total_hours_needed - missing_hours:g} of {total_hours_needed:g} hours. Requesting {missing_hours:g} missing hours...")
+            done_text = "\n".join(f"- {t['task_name']}" for t in tasks)
+            prompt = f"""
+        You are an expert software consultant continuing a timesheet that was cut off.
+        
+        Rules:
+        1. Generate tasks totalling EXACTLY {missing_hours:g} hours. Do NOT repeat the tasks already listed.
+        2. Each task must be between {settings.MIN_TASK_HOURS:g} and {settings.MAX_TASK_HOURS:g} hours.
+        3. All "task_name" values MUST be in {lang_instruction}.
+        4. Output JSON: List of objects with keys: "task_name", "hours". Return ONLY valid JSON, keep it short.
+        
+        Commits:
+        {commit_text}
+        
+        Tasks already listed:
+        {done_text}
+        """
+            self._log_to_file("INPUT", prompt)
+
+            try:
+                extra_tasks = self._recover_tasks(self._send_prompt(prompt))
+            except Exception as e:
+                # Never lose the salvaged tasks because the continuation failed
+                print(f"Error calling LLM for continuation: {e}")
+                self._log_to_file("ERROR", str(e))
+                break
+
+            if not extra_tasks:
+                break
+            tasks.extend(extra_tasks)
+
+        return tasks
+
+    def _send_prompt(self, prompt: str) -> str:
+        return self.router.send(prompt)
+
     def _log_to_file(self, type_str: str, content: str):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(settings.LOGS_DIR, f"interaction_{timestamp}_{type_str}.txt")
@@ -91,7 +153,7 @@ class DeepSeekProcessor:
         except Exception as e:
             print(f"Warning: Could not write log: {e}")
 
-    def _call_ollama(self, prompt: str) -> List[Dict]:
+    def _request_ollama(self, prompt: str, cancel: threading.Event, first_output: threading.Event, timeout: float) -> str:
         print(f"Sending request to Ollama ({self.ollama_model})...")
         payload = {
             "model": self.ollama_model,
@@ -99,21 +161,31 @@ class DeepSeekProcessor:
                 {"role": "system", "content": "You are a helpful assistant that generates JSON."},
                 {"role": "user", "content": prompt}
             ],
-            "stream": False,
+            "stream": True, # Stream so we can detect first output and stop when cancelled
             "format": "json" # Ollama support for strict JSON
         }
         
         try:
-            response = requests.post(self.ollama_url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            content = data['message']['content']
-            return self._parse_response(content)
+            with requests.post(self.ollama_url, json=payload, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                chunks = []
+                # NDJSON: one {"message": {"content": ...}, "done": bool} per line
+                for line in response.iter_lines():
+                    if cancel.is_set():
+                        raise BackendCancelled()
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    chunks.append(data.get('message', {}).get('content', ''))
+                    first_output.set()
+                    if data.get('done'):
+                        break
+                return "".join(chunks)
         except requests.exceptions.ConnectionError:
             print("Error: Could not connect to Ollama at http://localhost:11434. Is it running?")
             raise
 
-    def _call_deepseek(self, prompt: str) -> List[Dict]:
+    def _request_deepseek(self, prompt: str, cancel: threading.Event, first_output: threading.Event, timeout: float) -> str:
         print("Sending request to DeepSeek...")
         payload = {
             "model": "deepseek-chat",
@@ -122,29 +194,37 @@ class DeepSeekProcessor:
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.3,
-            "max_tokens": 4000
+            "max_tokens": 4000,
+            "stream": True
         }
-        response = requests.post("https://api.deepseek.com/chat/completions", headers=self.headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        content = data['choices'][0]['message']['content']
-        return self._parse_response(content)
+        with requests.post("https://api.deepseek.com/chat/completions", headers=self.headers, json=payload, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            chunks = []
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            for line in response.iter_lines(decode_unicode=True):
+                if cancel.is_set():
+                    raise BackendCancelled()
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)['choices'][0].get('delta', {})
+                chunks.append(delta.get('content') or '')
+                first_output.set()
+            return "".join(chunks)
 
-    def _parse_response(self, content: str) -> List[Dict]:
+    def _recover_tasks(self, content: str) -> List[Dict]:
+        """
+        Parses the LLM output into validated tasks, salvaging every complete task object
+        from truncated or malformed JSON.
+        """
         print(f"DEBUG: Raw LLM Response: {content}")
         self._log_to_file("OUTPUT", content)
         
-        # Clean markdown
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-        
-        try:
-            tasks = json.loads(content.strip())
-        except json.JSONDecodeError:
-            print("Error: LLM did not return valid JSON.")
-            return []
+        tasks, complete = recover_json(content)
+        if not complete:
+            print(f"Warning: LLM returned malformed JSON. Salvaged {len(tasks)} complete objects.")
 
         # Handle nested keys like {"tasks": [...]} which Llama loves to do
         if isinstance(tasks, dict):
@@ -160,17 +240,52 @@ class DeepSeekProcessor:
 
         final_tasks = []
         for task in tasks:
-            # Handle string case if LLM returned ["Task 1", "Task 2"]
-            if isinstance(task, str):
-                task = {"task_name": task, "hours": 2.0} # Default assumption
-            
-            # Inject client
-            if isinstance(task, dict):
-                task['client_project'] = settings.DEFAULT_CLIENT_PROJECT
+            task = self._validate_task(task)
+            if task:
                 final_tasks.append(task)
             
         return final_tasks
 
+    def _validate_task(self, task) -> Optional[Dict]:
+        """
+        Coerces a raw LLM item into {'task_name', 'client_project', 'hours'}.
+        Hours are clamped to the allowed task range. Returns None if unusable
+        (no name, or hours that are not a finite positive number).
+        """
+        # Handle string case if LLM returned ["Task 1", "Task 2"]
+        if isinstance(task, str):
+            task = {"task_name": task, "hours": 2.0} # Default assumption
+        
+        if not isinstance(task, dict):
+            return None
+
+        task_name = task.get('task_name') or task.get('task') or task.get('name') or ""
+        task_name = str(task_name).strip()
+        if not task_name:
+            return None
+
+        hours = task.get('hours', 1.0)
+        if isinstance(hours, str):
+            # "2.5h", "2,5 horas"...
+            match = re.search(r"-?\d+(?:\.\d+)?", hours.replace(",", "."))
+            hours = match.group(0) if match else None
+        try:
+            hours = float(hours)
+        except (TypeError, ValueError):
+            return None
+
+        if not math.isfinite(hours) or hours <= 0:
+            return None
+
+        hours = min(max(hours, settings.MIN_TASK_HOURS), settings.MAX_TASK_HOURS)
+
+        return {
+            "task_name": task_name,
+            # Inject client
+            "client_project": settings.DEFAULT_CLIENT_PROJECT,
+            "hours": hours
+        }
+
     def _fallback(self, commits: List[Dict]) -> List[Dict]:
         fallback_tasks = []
         for c in commits:
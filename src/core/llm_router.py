@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from src.config.settings import settings
+
+# A backend receives (prompt, cancel_event, first_output_event, timeout) and returns the raw content.
+# It must set first_output_event when the first chunk arrives and stop early when cancel_event is set.
+Backend = Callable[[str, threading.Event, threading.Event, float], str]
+
+class BackendCancelled(Exception):
+    """Raised by a backend that stopped because another one answered first."""
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (seconds). Percentiles return the bucket upper bound,
+    which is conservative enough for hedging thresholds.
+    """
+    BOUNDS = [0.5, 1, 2, 3, 5, 8, 12, 20, 30, 45, 60, 90, 120, 180, 300, 600]
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        # Last bucket catches everything above the largest bound
+        self.counts = list(counts) if counts and len(counts) == len(self.BOUNDS) + 1 else [0] * (len(self.BOUNDS) + 1)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.total:
+            return None
+
+        rank = self.total * p / 100.0
+        running = 0
+        for idx, count in enumerate(self.counts):
+            running += count
+            if running >= rank:
+                return self.BOUNDS[idx] if idx < len(self.BOUNDS) else float("inf")
+        return float("inf")
+
+class BackendRouter:
+    """
+    Routes a prompt to the primary LLM backend within a per-run latency budget.
+    If the primary has not produced output by a percentile-based threshold, a hedged
+    request is fired at the secondary and whichever answers first wins; the loser is
+    cancelled. At the deadline a TimeoutError is raised so the caller can fall back.
+    """
+    def __init__(self, backends: List[Tuple[str, Backend]]):
+        # Ordered by preference: first is primary, second (if any) is the hedge
+        self.backends = backends
+        self.deadline: Optional[float] = None
+        self.stats_path = os.path.join(settings.LOGS_DIR, settings.LLM_LATENCY_STATS_FILE)
+        self.histograms = self._load_stats()
+        # Backends finish on daemon threads, possibly after the caller moved on
+        self._stats_lock = threading.Lock()
+
+    def start_run(self):
+        """Starts the latency budget shared by every request of this run."""
+        self.deadline = time.monotonic() + settings.LLM_LATENCY_BUDGET
+
+    def send(self, prompt: str) -> str:
+        if self.deadline is None:
+            self.start_run()
+
+        start = time.monotonic()
+        if start >= self.deadline:
+            raise TimeoutError("LLM latency budget exhausted")
+
+        primary_name, primary = self.backends[0]
+        secondary = self.backends[1] if len(self.backends) > 1 else None
+        hedge_at = start + self.hedge_threshold(primary_name)
+
+        primary_future = self._submit(primary_name, primary, prompt)
+        running = {primary_future: primary_name}
+        pending = set(running)
+        error = None
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= self.deadline:
+                    raise TimeoutError(f"No LLM backend answered within the {settings.LLM_LATENCY_BUDGET:g}s budget")
+
+                # Streaming has started: no hedge needed, just wait for the primary to finish
+                if secondary and primary_future.call.first_output.is_set():
+                    secondary = None
+
+                timeout = self.deadline - now
+                if secondary:
+                    timeout = min(timeout, max(hedge_at - now, 0))
+
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        content = future.result()
+                    except BackendCancelled:
+                        continue
+                    except Exception as e:
+                        print(f"Error calling {running[future]}: {e}")
+                        error = e
+                        continue
+                    print(f"Response received from {running[future]}.")
+                    return content
+
+                # Hedge if the primary failed, or is still silent past the threshold
+                silent = not primary_future.call.first_output.is_set()
+                if secondary and (not pending or (silent and time.monotonic() >= hedge_at)):
+                    secondary_name, secondary_backend = secondary
+                    secondary = None
+                    reason = "failed" if not pending else f"has no output after {hedge_at - start:g}s"
+                    print(f"{primary_name} {reason}. Hedging with {secondary_name}...")
+                    future = self._submit(secondary_name, secondary_backend, prompt)
+                    running[future] = secondary_name
+                    pending.add(future)
+
+                if not pending:
+                    raise error or TimeoutError("No LLM backend answered")
+        finally:
+            # Cancel whatever is still running (the loser) and don't wait for it: a backend
+            # blocked in a request only sees the cancel flag once a line arrives, so it runs on a
+            # daemon thread that can't keep the process alive.
+            # Its latency so far is recorded first, so slow cases reach the histograms.
+            for future in running:
+                if not future.done():
+                    future.call.abandon()
+                future.call.cancel.set()
+            self._save_stats()
+
+    def hedge_threshold(self, name: str) -> float:
+        histogram = self.histograms.get(f"{name}.first_output")
+        if histogram is None or histogram.total < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_DELAY
+        return histogram.percentile(settings.LLM_HEDGE_PERCENTILE)
+
+    def _submit(self, name: str, backend: Backend, prompt: str) -> Future:
+        call = _BackendCall(self, name)
+        timeout = max(self.deadline - time.monotonic(), 0.1)
+        future = Future()
+        future.call = call
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                content = backend(prompt, call.cancel, call.first_output, timeout)
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            call.finished()
+            future.set_result(content)
+
+        threading.Thread(target=run, name=f"llm-{name}", daemon=True).start()
+        return future
+
+    def _record(self, key: str, seconds: float):
+        with self._stats_lock:
+            self.histograms.setdefault(key, LatencyHistogram()).record(seconds)
+
+    def _load_stats(self) -> Dict[str, LatencyHistogram]:
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {key: LatencyHistogram(counts) for key, counts in data.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_stats(self):
+        with self._stats_lock:
+            data = {key: list(h.counts) for key, h in self.histograms.items()}
+        try:
+            with open(self.stats_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Warning: Could not write latency stats: {e}")
+
+class _FirstOutputEvent(threading.Event):
+    """threading.Event that runs a callback the first time it is set."""
+    def __init__(self, on_first_set: Callable[[], None]):
+        super().__init__()
+        self._on_first_set = on_first_set
+
+    def set(self):
+        if not self.is_set():
+            super().set()
+            self._on_first_set()
+
+class _BackendCall:
+    """
+    Latency bookkeeping for one backend request. Each metric is recorded exactly once:
+    when it happens, or as a capped sample if the call is cancelled or times out first.
+    """
+    def __init__(self, router: BackendRouter, name: str):
+        self.router = router
+        self.name = name
+        self.start = time.monotonic()
+        self.cancel = threading.Event()
+        self.first_output = _FirstOutputEvent(lambda: self._record_once("first_output"))
+        self._recorded = set()
+        self._lock = threading.Lock()
+
+    def finished(self):
+        self._record_once("total")
+
+    def abandon(self):
+        """The call is being cancelled: it took at least this long (capped at the budget)."""
+        self._record_once("first_output")
+        self._record_once("total")
+
+    def _record_once(self, metric: str):
+        with self._lock:
+            if metric in self._recorded:
+                return
+            self._recorded.add(metric)
+        elapsed = min(time.monotonic() - self.start, settings.LLM_LATENCY_BUDGET)
+        self.router._record(f"{self.name}.{metric}", elapsed)
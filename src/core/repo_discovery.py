@@ -0,0 +1,127 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Tuple
+from src.config.settings import settings
+
+CACHE_VERSION = 2
+
+class RepoDiscovery:
+    """
+    Finds git repositories under workspace root directories.
+
+    Directories are walked in parallel with os.scandir, skipping .git internals and excluded
+    folders such as node_modules or .venv. Working trees are walked too, so checkouts nested in
+    another repository (e.g. a dotfiles repo at the root) are found, unless
+    REPO_DISCOVERY_STOP_AT_REPO is set. Each directory listing is cached with its mtime, so later
+    scans only re-list directories whose entries changed and just stat the rest.
+    """
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path or os.path.join(settings.LOGS_DIR, settings.REPO_DISCOVERY_CACHE_FILE)
+        self.exclude_dirs = set(settings.REPO_DISCOVERY_EXCLUDE_DIRS)
+        self.cache = self._load_cache()
+
+    def discover(self, roots: List[str]) -> List[str]:
+        """Returns the sorted absolute paths of every git repository found under roots."""
+        repos = []
+        new_cache = {}
+        rescanned = 0
+
+        with ThreadPoolExecutor(max_workers=settings.REPO_DISCOVERY_WORKERS) as executor:
+            pending = {executor.submit(self._scan_dir, root) for root in self._normalize_roots(roots)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, entry, from_cache = future.result()
+                    if entry is None:
+                        continue
+
+                    new_cache[path] = entry
+                    rescanned += not from_cache
+                    if entry['is_repo']:
+                        repos.append(path)
+                        if settings.REPO_DISCOVERY_STOP_AT_REPO:
+                            # Opt-in: don't walk the working tree of a repository
+                            continue
+                    for subdir in entry['subdirs']:
+                        pending.add(executor.submit(self._scan_dir, os.path.join(path, subdir)))
+
+        print(f"Discovered {len(repos)} repositories ({rescanned}/{len(new_cache)} directories re-listed).")
+
+        # Directories no longer reachable drop out of the cache
+        self.cache = new_cache
+        self._save_cache()
+        return sorted(set(repos))
+
+    def _normalize_roots(self, roots: List[str]) -> List[str]:
+        """
+        Returns the existing roots, normalized and deduplicated, without roots nested in
+        another root (they would be walked twice).
+        """
+        normalized = set()
+        for root in roots:
+            root = os.path.normcase(os.path.abspath(os.path.expanduser(root)))
+            if not os.path.isdir(root):
+                print(f"Warning: Workspace root does not exist: {root}")
+                continue
+            normalized.add(root)
+
+        # Shortest first, so a parent is always kept before its children are checked
+        kept = []
+        for root in sorted(normalized, key=len):
+            if not any(os.path.commonpath([root, parent]) == parent for parent in kept):
+                kept.append(root)
+        return kept
+
+    def _scan_dir(self, path: str) -> Tuple[str, Dict, bool]:
+        """Returns (path, {'mtime', 'is_repo', 'subdirs'}, from_cache). Entry is None if unreadable."""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return path, None, False
+
+        cached = self.cache.get(path)
+        if cached and cached.get('mtime') == mtime:
+            return path, cached, True
+
+        is_repo = False
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name == ".git":
+                        # Directory for regular clones, file for worktrees/submodules
+                        is_repo = True
+                        continue
+                    if entry.name in self.exclude_dirs:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Warning: Could not scan {path}: {e}")
+            return path, None, False
+
+        return path, {'mtime': mtime, 'is_repo': is_repo, 'subdirs': subdirs}, False
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Older caches stored no subdirs for repositories; start over
+            if data.get('version') != CACHE_VERSION:
+                return {}
+            return data['dirs']
+        except (OSError, ValueError, AttributeError, KeyError):
+            return {}
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({'version': CACHE_VERSION, 'dirs': self.cache}, f)
+        except Exception as e:
+            print(f"Warning: Could not write repo discovery cache: {e}")
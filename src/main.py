@@ -2,6 +2,7 @@ import argparse
 from datetime import date
 from src.config.settings import settings
 from src.core.github_client import LocalGitClient
+from src.core.repo_discovery import RepoDiscovery
 from src.core.llm_processor import DeepSeekProcessor
 from src.core.task_distributor import TaskDistributor
 from src.core.excel_manager import ExcelManager
@@ -12,7 +13,9 @@ def main():
     parser.add_argument("--month", type=int, default=date.today().month, help="Month to generate report for (1-12)")
     parser.add_argument("--year", type=int, default=settings.HOLIDAYS_YEAR, help="Year to generate report for")
     parser.add_argument("--dry-run", action="store_true", help="Print tasks without writing to Excel")
+    parser.add_argument("--patch", action="store_true", help="Update the existing report in place instead of overwriting it")
     parser.add_argument("--repo", action="append", help="Add repository path (can be used multiple times)")
+    parser.add_argument("--discover", action="append", help="Workspace root to scan for git repositories (can be used multiple times)")
     
     args = parser.parse_args()
     
@@ -20,6 +23,16 @@ def main():
     repos = settings.REPO_LIST
     if args.repo:
         repos.extend(args.repo)
+
+    # Auto-discover repositories under workspace roots
+    roots = settings.WORKSPACE_ROOTS + (args.discover or [])
+    if roots:
+        print(f"Discovering repositories under: {roots}")
+        known = {os.path.normcase(os.path.abspath(r)) for r in repos}
+        for repo in RepoDiscovery().discover(roots):
+            if os.path.normcase(repo) not in known:
+                known.add(os.path.normcase(repo))
+                repos.append(repo)
         
     if not repos:
         # Default to current directory if it's a git repo
@@ -93,7 +106,11 @@ def main():
 
         print(f"Writing report using template: {template_path}")
         manager = ExcelManager(template_path)
-        output = manager.create_report(schedule, args.year, args.month)
+        try:
+            output = manager.create_report(schedule, args.year, args.month, patch=args.patch)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
         print(f"Report generated: {output}")
 
 if __name__ == "__main__":
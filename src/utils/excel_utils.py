@@ -0,0 +1,97 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+from openpyxl.formula.tokenizer import Tokenizer, Token
+
+# A1-style cell ("$C$4") or row ("4") reference; column-only refs ("C") carry no row
+_CELL_RE = re.compile(r"^(\$?[A-Za-z]{1,3})?(\$?)(\d+)$")
+
+class RowShift(NamedTuple):
+    """
+    Rows inserted (amount > 0) or deleted (amount < 0) at row.
+    extend_row: when rows are appended right below a block ending at this row, ranges
+    ending there grow too (a total over the block keeps covering it).
+    """
+    row: int
+    amount: int
+    extend_row: Optional[int] = None
+
+def shift_formula(formula: str, shift: RowShift, sheet_title: str, formula_sheet_title: str) -> str:
+    """
+    Adjusts the references to sheet_title in a formula after rows are inserted or deleted,
+    the way Excel does: refs below the change move, ranges across it grow or shrink, and
+    single refs to deleted rows become #REF!. Refs to other sheets are left alone.
+    """
+    try:
+        tokens = Tokenizer(formula).items
+    except Exception:
+        return formula
+
+    changed = False
+    for token in tokens:
+        if token.type == Token.OPERAND and token.subtype == Token.RANGE:
+            value = shift_reference(token.value, shift, sheet_title, formula_sheet_title)
+            if value != token.value:
+                token.value = value
+                changed = True
+
+    if not changed:
+        return formula
+    return "=" + "".join(token.value for token in tokens)
+
+def shift_reference(reference: str, shift: RowShift, sheet_title: str, formula_sheet_title: Optional[str]) -> str:
+    """
+    Shifts a single reference such as "C4", "$C$4:$C$91" or "'ENERO'!C4:C91".
+    formula_sheet_title is the sheet unqualified refs belong to (None for defined names).
+    """
+    sheet, _, ref = reference.rpartition("!")
+    if sheet:
+        if sheet.strip("'").replace("''", "'") != sheet_title:
+            return reference
+    elif formula_sheet_title != sheet_title:
+        return reference
+
+    parts = ref.split(":")
+    if len(parts) > 2:
+        return reference
+
+    matches = [_CELL_RE.match(part) for part in parts]
+    if not all(matches):
+        # Named ranges, column ranges ("C:C"), errors...: nothing to shift
+        return reference
+
+    rows = [int(m.group(3)) for m in matches]
+    if len(rows) == 1:
+        new_rows = [_shift_row(rows[0], shift)]
+    else:
+        new_rows = list(shift_row_span(rows[0], rows[1], shift) or (None, None))
+
+    if any(row is None for row in new_rows):
+        return f"{sheet}!#REF!" if sheet else "#REF!"
+
+    new_ref = ":".join(f"{m.group(1) or ''}{m.group(2)}{row}" for m, row in zip(matches, new_rows))
+    return f"{sheet}!{new_ref}" if sheet else new_ref
+
+def _shift_row(row: int, shift: RowShift) -> Optional[int]:
+    if shift.amount > 0:
+        return row + shift.amount if row >= shift.row else row
+
+    last_deleted = shift.row - shift.amount - 1
+    if row < shift.row:
+        return row
+    if row <= last_deleted:
+        return None
+    return row + shift.amount
+
+def shift_row_span(start: int, end: int, shift: RowShift) -> Optional[Tuple[int, int]]:
+    """Returns the new (start, end) rows of a span, or None if all its rows were deleted."""
+    if shift.amount > 0:
+        new_start = start + shift.amount if start >= shift.row else start
+        grows = end >= shift.row or (end == shift.extend_row and start <= end)
+        return new_start, end + shift.amount if grows else end
+
+    last_deleted = shift.row - shift.amount - 1
+    new_start = start if start < shift.row else (shift.row if start <= last_deleted else start + shift.amount)
+    new_end = end if end < shift.row else (shift.row - 1 if end <= last_deleted else end + shift.amount)
+    if new_end < new_start:
+        return None
+    return new_start, new_end
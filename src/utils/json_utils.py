@@ -0,0 +1,93 @@
+import json
+from typing import Any, List, Tuple
+
+def strip_code_fences(content: str) -> str:
+    """
+    Removes markdown code fences around an LLM response.
+    Tolerates a missing closing fence (truncated output).
+    """
+    if "```json" in content:
+        content = content.split("```json", 1)[1]
+    elif "```" in content:
+        content = content.split("```", 1)[1]
+    else:
+        return content.strip()
+
+    return content.split("```", 1)[0].strip()
+
+def extract_json_objects(content: str) -> List[dict]:
+    """
+    Salvages every complete JSON object found in a (possibly truncated) text.
+    Objects nested inside other objects are not returned on their own, except when
+    the outer object is incomplete (e.g. {"tasks": [{...}, {...}, {"task_na).
+    """
+    decoder = json.JSONDecoder()
+    objects = []
+    idx = 0
+    length = len(content)
+
+    while idx < length:
+        start = content.find("{", idx)
+        if start == -1:
+            break
+
+        try:
+            obj, end = decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            # Incomplete or broken object: step inside it and keep scanning
+            idx = start + 1
+            continue
+
+        if isinstance(obj, dict):
+            objects.append(obj)
+        idx = end
+
+    return objects
+
+def recover_json(content: str) -> Tuple[Any, bool]:
+    """
+    Parses an LLM response as JSON, falling back to partial recovery.
+
+    Returns:
+        (data, complete) where complete is False if the payload had to be salvaged
+        from malformed or truncated output.
+    """
+    content = strip_code_fences(content)
+
+    try:
+        return json.loads(content), True
+    except json.JSONDecodeError:
+        pass
+
+    # Valid JSON surrounded by prose ("Sure! Note [draft]: [...] Hope it helps").
+    # Only brackets at depth 0 are candidates, so a truncated list never yields just one inner object.
+    decoder = json.JSONDecoder()
+    depth = 0
+    in_string = escaped = False
+    for idx, char in enumerate(content):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char in "[{":
+            if depth == 0:
+                try:
+                    data, _ = decoder.raw_decode(content, idx)
+                except json.JSONDecodeError:
+                    data = None
+                # Skip prose like "[1]"; a task list holds objects (or plain task names)
+                if isinstance(data, dict) or (isinstance(data, list) and any(isinstance(x, (dict, str)) for x in data)):
+                    return data, True
+            depth += 1
+        elif char in "]}":
+            depth = max(depth - 1, 0)
+        elif char == '"' and depth > 0:
+            # Quotes only matter inside JSON; prose at depth 0 may have stray ones
+            in_string = True
+
+    return extract_json_objects(content), False
@@ -0,0 +1,8 @@
+import pytest
+from src.config.settings import settings
+
+@pytest.fixture(autouse=True)
+def logs_dir(tmp_path, monkeypatch):
+    # Keep interaction logs, latency stats and caches out of the repo
+    monkeypatch.setattr(settings, "LOGS_DIR", str(tmp_path))
+    return tmp_path
@@ -0,0 +1,141 @@
+import copy
+import os
+import shutil
+from datetime import date
+import openpyxl
+from openpyxl.worksheet.datavalidation import DataValidation
+import pytest
+from src.core.excel_manager import ExcelManager, MANAGED_RANGE_NAME, START_ROW, DAY_COL_OFFSET
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), "..", "src", "static", "Seguimiento de actividades 2026.xlsx")
+
+def task(name, hours=2.0):
+    return {"task_name": name, "client_project": "Synaptica", "hours": hours}
+
+def expected_rows(schedule):
+    rows = []
+    for day in sorted(schedule):
+        for t in schedule[day]:
+            marks = [None] * 31
+            marks[day.day - 1] = "X"
+            rows.append((t["task_name"], t["client_project"], t["hours"], *marks))
+    return rows
+
+def sheet_rows(path, count, first_row=START_ROW):
+    sheet = openpyxl.load_workbook(path)["ENERO"]
+    return [tuple(c.value for c in row) for row in sheet.iter_rows(min_row=first_row, max_row=first_row + count - 1, max_col=DAY_COL_OFFSET + 31)]
+
+@pytest.fixture
+def manager(tmp_path):
+    template = tmp_path / "template.xlsx"
+    shutil.copyfile(TEMPLATE, template)
+    return ExcelManager(str(template))
+
+@pytest.fixture
+def schedule():
+    return {date(2026, 1, d): [task(f"Task {d}a"), task(f"Task {d}b")] for d in (5, 6, 7, 8)}
+
+def test_patch_matches_fresh_report(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+
+    new_schedule = copy.deepcopy(schedule)
+    new_schedule[date(2026, 1, 5)].insert(1, task("New task"))
+    new_schedule[date(2026, 1, 6)].pop(0)
+    new_schedule[date(2026, 1, 7)][0]["hours"] = 3.0
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    expected = expected_rows(new_schedule)
+    assert sheet_rows(output, len(expected) + 1) == expected + [(None,) * (DAY_COL_OFFSET + 31)]
+
+def test_patch_keeps_manual_note_below_managed_rows(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+    note_row = START_ROW + 8 # Directly below the 8 generated rows
+
+    workbook = openpyxl.load_workbook(output)
+    workbook["ENERO"].cell(row=note_row, column=1, value="Manual note")
+    workbook.save(output)
+
+    new_schedule = copy.deepcopy(schedule)
+    new_schedule[date(2026, 1, 8)][1] = task("Renamed task")
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    assert sheet_rows(output, 8) == expected_rows(new_schedule)
+    assert sheet_rows(output, 1, first_row=note_row)[0][0] == "Manual note"
+
+def test_patch_shrinking_schedule_only_deletes_managed_rows(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+    note_row = START_ROW + 8
+
+    workbook = openpyxl.load_workbook(output)
+    workbook["ENERO"].cell(row=note_row, column=1, value="Manual note")
+    workbook.save(output)
+
+    new_schedule = {day: tasks for day, tasks in schedule.items() if day.day != 8}
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    assert sheet_rows(output, 6) == expected_rows(new_schedule)
+    assert sheet_rows(output, 1, first_row=START_ROW + 6)[0][0] == "Manual note"
+
+    sheet = openpyxl.load_workbook(output)["ENERO"]
+    assert sheet.defined_names[MANAGED_RANGE_NAME].attr_text == "'ENERO'!$A$4:$AH$9"
+
+def test_patch_without_changes_does_not_save(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+    mtime = os.stat(output).st_mtime_ns
+
+    manager.create_report(schedule, 2026, 1, patch=True)
+    assert os.stat(output).st_mtime_ns == mtime
+
+def edit_report(output, edit):
+    workbook = openpyxl.load_workbook(output)
+    edit(workbook, workbook["ENERO"])
+    workbook.save(output)
+
+def test_patch_keeps_total_formula_and_merged_cells_below_block(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+    total_row = START_ROW + 9 # One blank row below the 8 generated rows
+
+    def edit(workbook, sheet):
+        sheet.cell(row=total_row, column=3, value=f"=SUM(C{START_ROW}:C{START_ROW + 7})")
+        sheet.merge_cells(start_row=total_row + 1, start_column=1, end_row=total_row + 2, end_column=2)
+        workbook["FEBRERO"]["A1"] = f"=ENERO!C{total_row}"
+    edit_report(output, edit)
+
+    # Append a task at the end of the block
+    new_schedule = copy.deepcopy(schedule)
+    new_schedule[date(2026, 1, 8)].append(task("Extra task"))
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    workbook = openpyxl.load_workbook(output)
+    sheet = workbook["ENERO"]
+    assert sheet.cell(row=total_row + 1, column=3).value == f"=SUM(C{START_ROW}:C{START_ROW + 8})"
+    assert f"A{total_row + 2}:B{total_row + 3}" in {r.coord for r in sheet.merged_cells.ranges}
+    assert workbook["FEBRERO"]["A1"].value == f"=ENERO!C{total_row + 1}"
+
+    # Remove a task from the middle: the total shrinks back
+    new_schedule[date(2026, 1, 6)].pop(0)
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    sheet = openpyxl.load_workbook(output)["ENERO"]
+    assert sheet.cell(row=total_row, column=3).value == f"=SUM(C{START_ROW}:C{START_ROW + 7})"
+    assert f"A{total_row + 1}:B{total_row + 2}" in {r.coord for r in sheet.merged_cells.ranges}
+
+def test_patch_refuses_to_shift_rows_under_data_validation(manager, schedule):
+    output = manager.create_report(schedule, 2026, 1)
+
+    def edit(workbook, sheet):
+        validation = DataValidation(type="whole")
+        validation.add(f"C{START_ROW + 9}")
+        sheet.add_data_validation(validation)
+    edit_report(output, edit)
+
+    new_schedule = copy.deepcopy(schedule)
+    new_schedule[date(2026, 1, 8)].append(task("Extra task"))
+    with pytest.raises(ValueError, match="without --patch"):
+        manager.create_report(new_schedule, 2026, 1, patch=True)
+
+    # Changes that don't move rows are still patched
+    new_schedule = copy.deepcopy(schedule)
+    new_schedule[date(2026, 1, 8)][0]["hours"] = 1.5
+    manager.create_report(new_schedule, 2026, 1, patch=True)
+    assert sheet_rows(output, 8) == expected_rows(new_schedule)
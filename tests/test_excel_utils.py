@@ -0,0 +1,23 @@
+import pytest
+from src.utils.excel_utils import RowShift, shift_formula
+
+INSERT = RowShift(row=10, amount=2)
+DELETE = RowShift(row=10, amount=-2) # Rows 10-11
+
+@pytest.mark.parametrize("formula, shift, expected", [
+    ("=C9+C10", INSERT, "=C9+C12"),
+    ("=SUM($C$4:$C$20)", INSERT, "=SUM($C$4:$C$22)"),
+    ("=SUM(C4:C9)", INSERT, "=SUM(C4:C9)"),
+    ("=SUM(C4:C9)", RowShift(row=10, amount=2, extend_row=9), "=SUM(C4:C11)"),
+    ("=SUM(C4:C20)", DELETE, "=SUM(C4:C18)"),
+    ("=C10", DELETE, "=#REF!"),
+    ("=SUM(C10:C11)", DELETE, "=SUM(#REF!)"),
+    ("=C12*2", DELETE, "=C10*2"),
+    ("=SUM(C:C)+Total", INSERT, "=SUM(C:C)+Total"),
+    ("=FEBRERO!C20+'ENERO'!C20", INSERT, "=FEBRERO!C20+'ENERO'!C22"),
+])
+def test_shift_formula(formula, shift, expected):
+    assert shift_formula(formula, shift, "ENERO", "ENERO") == expected
+
+def test_unqualified_refs_in_other_sheets_are_left_alone():
+    assert shift_formula("=C20", INSERT, "ENERO", "FEBRERO") == "=C20"
@@ -0,0 +1,33 @@
+import os
+import subprocess
+from datetime import date
+import pytest
+from src.core.github_client import LocalGitClient
+
+def commit(repo, message, when):
+    env = dict(os.environ, GIT_AUTHOR_NAME="Dev", GIT_AUTHOR_EMAIL="dev@example.com", GIT_AUTHOR_DATE=when,
+               GIT_COMMITTER_NAME="Dev", GIT_COMMITTER_EMAIL="dev@example.com", GIT_COMMITTER_DATE=when)
+    subprocess.run(['git', '-C', str(repo), 'commit', '-q', '--allow-empty', '-m', message], check=True, env=env)
+
+@pytest.fixture
+def repo(tmp_path):
+    subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+    return tmp_path
+
+def test_commit_in_range_by_local_time_is_not_skipped(repo, monkeypatch):
+    # 2025-12-31 22:00 in UTC-08:00 is 2026-01-01 01:00 on a UTC-05:00 machine
+    monkeypatch.setenv("TZ", "America/Bogota")
+    commit(repo, "Late commit", "2025-12-31T22:00:00-08:00")
+
+    commits = LocalGitClient().get_commits(str(repo), date(2026, 1, 1), date(2026, 1, 31))
+    assert [c['message'] for c in commits] == ["Late commit"]
+
+def test_idle_repo_is_skipped_before_full_log(repo):
+    commit(repo, "Old commit", "2025-06-01T12:00:00+00:00")
+    client = LocalGitClient()
+
+    assert not client.has_commits_since(str(repo), "2026-01-01 00:00:00")
+    assert client.get_commits(str(repo), date(2026, 1, 1), date(2026, 1, 31)) == []
+
+def test_repo_without_commits_is_skipped(repo):
+    assert LocalGitClient().get_commits(str(repo), date(2026, 1, 1), date(2026, 1, 31)) == []
@@ -0,0 +1,77 @@
+from datetime import datetime
+import pytest
+from src.config.settings import settings
+from src.core.llm_processor import DeepSeekProcessor
+from src.utils.json_utils import recover_json
+
+COMMITS = [{'date': datetime(2026, 1, 5), 'message': "Add login", 'repo': "app"}]
+
+@pytest.fixture
+def processor():
+    return DeepSeekProcessor()
+
+def fake_llm(processor, responses):
+    """Replaces the backend with canned responses; returns the list of prompts sent."""
+    prompts = []
+    def send(prompt):
+        prompts.append(prompt)
+        return responses[len(prompts) - 1]
+    processor._send_prompt = send
+    return prompts
+
+@pytest.mark.parametrize("hours", [float("nan"), float("inf"), 0, -4, "-4h", "abc", None])
+def test_validate_task_rejects_invalid_hours(processor, hours):
+    assert processor._validate_task({"task_name": "Task", "hours": hours}) is None
+
+@pytest.mark.parametrize("hours, expected", [(12, 3.0), (0.2, 0.5), ("2,5 horas", 2.5), ("1.5h", 1.5)])
+def test_validate_task_coerces_hours(processor, hours, expected):
+    assert processor._validate_task({"task_name": "Task", "hours": hours})['hours'] == expected
+
+def test_recover_json_skips_brackets_in_leading_prose():
+    data, complete = recover_json('Sure! Note [draft]:\n[{"task_name": "a", "hours": 1}]\nHope it helps')
+    assert complete
+    assert data == [{"task_name": "a", "hours": 1}]
+
+def test_recover_json_salvages_truncated_list():
+    data, complete = recover_json('{"tasks": [{"task_name": "a", "hours": 1}, {"task_name": "b", "hours": 2}, {"task_na')
+    assert not complete
+    assert [t["task_name"] for t in data] == ["a", "b"]
+
+def test_continuation_after_truncated_output(processor):
+    prompts = fake_llm(processor, [
+        '[{"task_name": "a", "hours": 3}, {"task_name": "b", "ho',
+        '[{"task_name": "c", "hours": 3}, {"task_name": "d", "hours": 2}]',
+    ])
+    tasks = processor.process_commits(COMMITS, target_days=1)
+
+    assert len(prompts) == 2
+    assert "EXACTLY 5 hours" in prompts[1]
+    assert [t['task_name'] for t in tasks] == ["a", "c", "d"]
+
+def test_continuation_after_validation_shrinks_hours(processor):
+    # Well-formed JSON, but the 12h task is clamped to 3h
+    prompts = fake_llm(processor, [
+        '[{"task_name": "a", "hours": 12}]',
+        '[{"task_name": "b", "hours": 3}, {"task_name": "c", "hours": 2}]',
+    ])
+    tasks = processor.process_commits(COMMITS, target_days=1)
+
+    assert len(prompts) == 2
+    assert sum(t['hours'] for t in tasks) == 8
+
+def test_no_continuation_when_quota_is_met(processor):
+    prompts = fake_llm(processor, ['[{"task_name": "a", "hours": 3}, {"task_name": "b", "hours": 3}, {"task_name": "c", "hours": 2}]'])
+    processor.process_commits(COMMITS, target_days=1)
+    assert len(prompts) == 1
+
+@pytest.mark.parametrize("use_ollama, api_key, hedge_with_ollama, expected", [
+    (True, "", False, ["Ollama"]),
+    (True, "key", False, ["Ollama", "DeepSeek"]),
+    (False, "key", False, ["DeepSeek"]),
+    (False, "key", True, ["DeepSeek", "Ollama"]),
+])
+def test_hedge_backend_only_when_configured(monkeypatch, use_ollama, api_key, hedge_with_ollama, expected):
+    monkeypatch.setattr(settings, "USE_OLLAMA", use_ollama)
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", api_key)
+    monkeypatch.setattr(settings, "LLM_HEDGE_WITH_OLLAMA", hedge_with_ollama)
+    assert [name for name, _ in DeepSeekProcessor().router.backends] == expected
@@ -0,0 +1,147 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import pytest
+from src.config.settings import settings
+from src.core import llm_router
+from src.core.llm_router import BackendRouter, BackendCancelled, LatencyHistogram
+
+@pytest.fixture(autouse=True)
+def fast_budget(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_LATENCY_BUDGET", 2.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY", 0.2)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 90.0)
+
+def fake_backend(first_output_after=None, finish_after=0.0, result="ok", calls=None):
+    """Backend that optionally streams after a delay and honours cancellation."""
+    def backend(prompt, cancel, first_output, timeout):
+        if calls is not None:
+            calls.append(backend)
+        start = time.monotonic()
+        while time.monotonic() - start < finish_after:
+            if cancel.is_set():
+                backend.cancelled = True
+                raise BackendCancelled()
+            if first_output_after is not None and time.monotonic() - start >= first_output_after:
+                first_output.set()
+            time.sleep(0.01)
+        first_output.set()
+        return result
+    backend.cancelled = False
+    return backend
+
+def failing_backend(prompt, cancel, first_output, timeout):
+    raise RuntimeError("boom")
+
+@pytest.fixture
+def wait_calls(monkeypatch):
+    calls = []
+    real_wait = llm_router.wait
+    def counting_wait(*args, **kwargs):
+        calls.append(kwargs.get("timeout"))
+        return real_wait(*args, **kwargs)
+    monkeypatch.setattr(llm_router, "wait", counting_wait)
+    return calls
+
+def test_streaming_primary_does_not_spin_after_hedge_threshold(wait_calls):
+    primary = fake_backend(first_output_after=0.0, finish_after=0.8, result="primary")
+    secondary_calls = []
+    router = BackendRouter([("A", primary), ("B", fake_backend(result="secondary", calls=secondary_calls))])
+
+    assert router.send("prompt") == "primary"
+    assert len(wait_calls) <= 3
+    assert not secondary_calls
+
+def test_silent_primary_is_hedged_and_cancelled():
+    primary = fake_backend(finish_after=1.5, result="primary")
+    router = BackendRouter([("A", primary), ("B", fake_backend(finish_after=0.05, result="secondary"))])
+
+    start = time.monotonic()
+    assert router.send("prompt") == "secondary"
+    assert time.monotonic() - start < 1.0
+
+    time.sleep(0.1)
+    assert primary.cancelled
+
+def test_failed_primary_hedges_immediately():
+    router = BackendRouter([("A", failing_backend), ("B", fake_backend(result="secondary"))])
+
+    start = time.monotonic()
+    assert router.send("prompt") == "secondary"
+    assert time.monotonic() - start < settings.LLM_HEDGE_DELAY
+
+def test_deadline_raises_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_LATENCY_BUDGET", 0.5)
+    router = BackendRouter([("A", fake_backend(finish_after=5)), ("B", fake_backend(finish_after=5))])
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        router.send("prompt")
+    assert time.monotonic() - start < 0.7
+
+def test_hedge_threshold_uses_percentile_once_enough_samples():
+    router = BackendRouter([("A", fake_backend())])
+    assert router.hedge_threshold("A") == settings.LLM_HEDGE_DELAY
+
+    for seconds in [0.4, 0.8, 4.0]:
+        router._record("A.first_output", seconds)
+    assert router.hedge_threshold("A") == 5
+
+def test_cancelled_loser_records_capped_sample():
+    router = BackendRouter([("A", fake_backend(finish_after=1.5)), ("B", fake_backend(finish_after=0.05))])
+    router.send("prompt")
+
+    # The silent primary was cancelled after the hedge delay: it still counts as a slow sample
+    assert router.histograms["A.first_output"].total == 1
+    assert router.histograms["A.total"].total == 1
+    assert router.histograms["B.first_output"].total == 1
+
+    # Samples are persisted when the call returns
+    assert BackendRouter([("A", fake_backend())]).histograms["A.first_output"].total == 1
+
+def test_first_output_recorded_even_if_primary_fails_later():
+    def streams_then_fails(prompt, cancel, first_output, timeout):
+        first_output.set()
+        raise RuntimeError("connection reset")
+
+    router = BackendRouter([("A", streams_then_fails)])
+    with pytest.raises(RuntimeError):
+        router.send("prompt")
+    assert router.histograms["A.first_output"].total == 1
+
+def test_latency_histogram_percentile():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+
+    for seconds in [1, 1, 2, 2, 5, 40]:
+        histogram.record(seconds)
+    assert histogram.percentile(50) == 2
+    assert histogram.percentile(90) == 45
+
+def test_process_exits_without_waiting_for_blocked_loser(tmp_path):
+    # The primary blocks (like a silent socket) and never checks the cancel flag
+    script = textwrap.dedent("""
+        import time
+        from src.core.llm_router import BackendRouter
+
+        def stuck(prompt, cancel, first_output, timeout):
+            time.sleep(timeout)
+
+        def fast(prompt, cancel, first_output, timeout):
+            first_output.set()
+            return "secondary"
+
+        print(BackendRouter([("A", stuck), ("B", fast)]).send("prompt"))
+    """)
+    env = dict(os.environ, LOGS_DIR=str(tmp_path), LLM_LATENCY_BUDGET="30", LLM_HEDGE_DELAY="0.2")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", script], cwd=repo_root, env=env, capture_output=True, text=True, timeout=20)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("secondary")
+    assert time.monotonic() - start < 5
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import pytest
+from src.config.settings import settings
+from src.core.repo_discovery import RepoDiscovery
+
+def git_init(path):
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', str(path)], check=True)
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "ws"
+    for repo in ["a/r1", "b/c/r2", "node_modules/r3", ".venv/r4"]:
+        git_init(root / repo)
+    return root
+
+def test_discover_prunes_excluded_dirs(workspace, logs_dir):
+    repos = RepoDiscovery().discover([str(workspace)])
+    assert repos == [str(workspace / "a/r1"), str(workspace / "b/c/r2")]
+
+def test_discover_walks_into_repo_working_trees(workspace, logs_dir):
+    # A workspace root that is itself a repo (dotfiles, meta-repo) still exposes nested checkouts
+    git_init(workspace)
+    repos = RepoDiscovery().discover([str(workspace)])
+    assert repos == [str(workspace), str(workspace / "a/r1"), str(workspace / "b/c/r2")]
+    assert not any(".git" in os.path.relpath(path, workspace) for path in RepoDiscovery().cache)
+
+def test_stop_at_repo_is_opt_in(workspace, logs_dir, monkeypatch):
+    git_init(workspace)
+    monkeypatch.setattr(settings, "REPO_DISCOVERY_STOP_AT_REPO", True)
+    assert RepoDiscovery().discover([str(workspace)]) == [str(workspace)]
+
+def test_rescan_uses_cache_and_sees_new_repos(workspace, logs_dir):
+    RepoDiscovery().discover([str(workspace)])
+
+    discovery = RepoDiscovery()
+    listed = []
+    original_scan = discovery._scan_dir
+    def tracking_scan(path):
+        result = original_scan(path)
+        if not result[2]:
+            listed.append(path)
+        return result
+    discovery._scan_dir = tracking_scan
+
+    git_init(workspace / "b/new")
+    repos = discovery.discover([str(workspace)])
+
+    assert str(workspace / "b/new") in repos
+    # Only "b" (new entry) and the new repo's directories are re-listed
+    assert str(workspace / "a") not in listed
+    assert str(workspace / "b") in listed
+
+def test_overlapping_roots_list_each_repo_once(workspace, logs_dir):
+    roots = [str(workspace), str(workspace) + os.sep, str(workspace / "a"), str(workspace / "b" / ".." / "a")]
+    discovery = RepoDiscovery()
+    repos = discovery.discover(roots)
+
+    assert repos == [str(workspace / "a/r1"), str(workspace / "b/c/r2")]
+    # Every directory walked once: the roots collapse to the workspace itself
+    assert discovery._normalize_roots(roots) == [str(workspace)]